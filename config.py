@@ -0,0 +1,58 @@
+# Stammdaten & Dienst-Adressen. Als importiertes Modul wird das nicht bei jedem Streamlit-Rerun neu ausgeführt.
+
+# --- 1. DATENBASIS ---
+# Optional pro Schule: "coords": [lat, lon] -> spart den Nominatim-Aufruf komplett
+SCHUL_DATEN = {
+    "Altona": {
+        "Othmarschen": [{"name": "Gymnasium Hochrad", "id": "5887", "students": 950, "address": "Hochrad 2, 22605 Hamburg", "kess": 6}] 
+    },
+    "Bergedorf": {
+        "Kirchwerder": [{"name": "Schule Zollenspieker", "id": "5648", "students": 230, "address": "Kirchwerder Landweg 558, 21037 Hamburg", "kess": 4}]
+    },
+    "Mitte": {
+        "Billstedt": [{"name": "Grundschule Mümmelmannsberg", "id": "5058", "students": 340, "address": "Mümmelmannsberg 52, 22115 Hamburg", "kess": 2}]
+    }
+}
+
+# Auswahllisten einmal vorberechnen statt bei jeder Interaktion die Dicts zu durchlaufen
+BEZIRKE = tuple(SCHUL_DATEN)
+STADTTEILE = {bez: tuple(stadtteile) for bez, stadtteile in SCHUL_DATEN.items()}
+# Adressen, die noch geocodet werden müssen (Schulen ohne feste "coords"); Vorab-Abruf beim Start
+GEOCODE_ADDRESSES = tuple(s["address"] for bez in SCHUL_DATEN.values() for schulen in bez.values() for s in schulen if not s.get("coords"))
+
+# --- 2. APIs & DIENSTE ---
+API_URL_TRANSPARENZ = "https://suche.transparenz.hamburg.de/api/3/action/package_search"
+API_URL_WEATHER = "https://api.open-meteo.com/v1/forecast"
+API_URL_NOMINATIM = "https://nominatim.openstreetmap.org/search"
+
+# WFS (Vektordaten für Gebäude-Auswahl)
+# GeoJSON komprimiert sehr gut: mit installiertem brotli sendet requests/urllib3
+# automatisch "Accept-Encoding: gzip, deflate, br" und dekodiert die Antwort selbst.
+WFS_ALKIS_SIMPLE = "https://geodienste.hamburg.de/WFS_HH_ALKIS_vereinfacht"
+# Nur die genutzten Attribute anfordern (leer = alle). Den Namen des Geometrie-Attributs liest services.py
+# einmal per DescribeFeatureType; fehlt dort ein Feld, wird ohne PROPERTYNAME abgefragt.
+WFS_PROPERTIES = ("gebaeudefunktion_bezeichnung",)
+
+# WMS (Hintergrundbilder & Overlays)
+WMS_STADTPLAN = "https://geodienste.hamburg.de/HH_WMS_Stadtplan"
+WMS_ALKIS_BILD = "https://geodienste.hamburg.de/HH_WMS_ALKIS" # Spezieller Bild-Dienst für ALKIS
+WMS_SOLAR = "https://geodienste.hamburg.de/HH_WMS_Solaratlas"
+WMS_LAERM = "https://geodienste.hamburg.de/HH_WMS_Strassenlaerm_2017"
+WMS_HOCHWASSER = "https://geodienste.hamburg.de/HH_WMS_Ueberschwemmungsgebiete"
+WMS_DENKMAL = "https://geodienste.hamburg.de/HH_WMS_Denkmalkartierung"
+
+# WMS-Layer der Hauptkarte: (beim Start sichtbar, URL, Layer, Deckkraft, Name, Attribution).
+# Ein-/Ausblenden danach nur über die LayerControl der Karte -> das Karten-HTML bleibt gleich.
+WMS_OVERLAYS = [
+    (True, WMS_STADTPLAN, "schwarzweiss", 0.6, "Flurstücke", "Geoportal Hamburg"), # Layer mit Flurstücken und Nummern
+    (False, WMS_LAERM, "laerm_str_lden", 0.5, "Lärm", "HH"),
+    (False, WMS_HOCHWASSER, "ueberschwemmungsgebiete", 0.5, "Hochwasser", "HH"),
+    (False, WMS_DENKMAL, "dk_denkmal_flaeche", 0.6, "Denkmal", "HH"),
+]
+# Start-Zoom aller Karten (und der Vorschau). 17 statt 19: gleich viele Kacheln, aber 4x breiterer Ausschnitt
+# (Umfeld der Schule sofort sichtbar, weniger Nachladen beim ersten Herauszoomen)
+MAP_ZOOM = 17
+# 512er-Kacheln: ein Viertel der GetMap-Requests pro Viewport; nachladen erst wenn Pan/Zoom vorbei ist.
+# Über Zoom 17 skaliert Leaflet die vorhandenen Kacheln hoch, statt neue GetMaps zu schicken.
+WMS_TILE_OPTIONS = {"tile_size": 512, "detect_retina": False, "update_when_idle": True, "keep_buffer": 4,
+                    "max_native_zoom": 17, "max_zoom": 20}
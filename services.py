@@ -0,0 +1,403 @@
+# Datenabruf & Aufbereitung (HTTP, Caches, GeoJSON). Wird von app.py importiert,
+# läuft also nur einmal pro Prozess statt bei jedem Rerun.
+import math
+import os
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import orjson
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import API_URL_NOMINATIM, API_URL_TRANSPARENZ, API_URL_WEATHER, GEOCODE_ADDRESSES, WFS_ALKIS_SIMPLE, WFS_PROPERTIES
+
+_WFS_PARAMS_BASE = {
+    "SERVICE": "WFS",
+    "REQUEST": "GetFeature",
+    "TYPENAME": "alkis_gebaeude",
+    "OUTPUTFORMAT": "json",
+    "SRSNAME": "EPSG:4326",
+}
+
+# Eine Session für alle Aufrufe: TCP/TLS-Verbindungen werden wiederverwendet.
+# cache_resource statt Modul-Variable: überlebt auch das Neuladen des Moduls bei Code-Änderungen.
+# Wiederholungen macht urllib3 (mit kurzem Backoff): Verbindungsfehler bis zu 2x, Read-Timeout nur 1x.
+@st.cache_resource
+def get_session():
+    session = requests.Session()
+    session.headers["User-Agent"] = "HH-Schulbau-Monitor-V25/1.0"  # Pflicht für Nominatim
+    retry = Retry(total=2, read=1, backoff_factor=0.2)
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry))
+    return session
+
+# Kurzer Connect-/Read-Timeout statt stumm 5 s zu warten
+HTTP_TIMEOUT = (1.0, 3.0)
+HTTP_ERRORS = (requests.Timeout, requests.ConnectionError, ValueError)
+
+def round_coords(lat, lon):
+    # ~1,1 m: derselbe Ort landet immer im selben Cache-Eintrag, egal wie genau der Geocoder antwortet
+    return round(lat, 5), round(lon, 5)
+
+def http_get(url, params=None, timeout=HTTP_TIMEOUT):
+    return get_session().get(url, params=params, timeout=timeout)
+
+# Geocoding-Ergebnisse auf Platte: überlebt Neustarts und "Reset", jede Adresse nur einmal abfragen
+GEOCODE_CACHE_FILE = Path(__file__).with_name(".geocode_cache.json")
+
+def _geocode_key(address_string):
+    # "Musterstraße  1" und "musterstrasse 1" teilen sich einen Eintrag
+    return " ".join(address_string.lower().replace("ß", "ss").split())
+
+def _load_geocode_cache():
+    try:
+        return orjson.loads(GEOCODE_CACHE_FILE.read_bytes())
+    except (OSError, ValueError):
+        return {}
+
+_GEOCODE_LOCK = threading.Lock()  # Vorab-Thread und Skript schreiben dieselbe Datei
+
+def _store_geocode(address_string, coords):
+    # Lesen geschieht ohne Lock -> erst in eine Temp-Datei schreiben und dann atomar ersetzen,
+    # damit nie eine halb geschriebene Datei gelesen wird (sonst {} und doppelter Nominatim-Request)
+    with _GEOCODE_LOCK:
+        cache = _load_geocode_cache()
+        cache[_geocode_key(address_string)] = coords
+        tmp = GEOCODE_CACHE_FILE.with_name(f"{GEOCODE_CACHE_FILE.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_bytes(orjson.dumps(cache))
+            os.replace(tmp, GEOCODE_CACHE_FILE)
+        except OSError:
+            pass
+
+# Fehlgeschlagene Adressen pro Prozess merken: kein erneuter 15-s-Timeout bis zum "Reset"
+FAILED_ADDRESSES = set()
+
+# Alle Nominatim-Aufrufe (Skript und Vorab-Thread) starten mit mind. 1 s Abstand.
+# Der Lock schützt nur die Taktung, nicht den Request: die Auswahl wartet nie auf einen langsamen Vorab-Abruf.
+_NOMINATIM_LOCK = threading.Lock()
+_NOMINATIM_INTERVAL = 1.0
+_nominatim_next = 0.0
+
+# Nominatim antwortet unter Last langsam -> großzügiger Read-Timeout; der Vorab-Abruf gibt früher auf
+NOMINATIM_TIMEOUT = (3.0, 15.0)
+PREFETCH_TIMEOUT = (1.0, 4.0)
+
+def _nominatim_slot():
+    # Nächsten freien Startzeitpunkt reservieren, dann außerhalb des Locks bis dahin warten
+    global _nominatim_next
+    with _NOMINATIM_LOCK:
+        start = max(time.monotonic(), _nominatim_next)
+        _nominatim_next = start + _NOMINATIM_INTERVAL
+    time.sleep(max(0.0, start - time.monotonic()))
+
+def _geocode(session, address_string, remember_failure=True, timeout=NOMINATIM_TIMEOUT):
+    key = _geocode_key(address_string)
+    cached = _load_geocode_cache().get(key)
+    if cached: return cached
+    if key in FAILED_ADDRESSES: return None
+    _nominatim_slot()
+    # Nach dem Warten nochmal nachsehen: der andere Thread hat die Adresse evtl. gerade geholt
+    cached = _load_geocode_cache().get(key)
+    if cached: return cached
+    params = {"q": address_string, "format": "json", "limit": 1}
+    try:
+        response = session.get(API_URL_NOMINATIM, params=params, timeout=timeout)
+        data = orjson.loads(response.content)
+        if data:
+            coords = [float(data[0]["lat"]), float(data[0]["lon"])]
+            _store_geocode(address_string, coords)
+            return coords
+    except (requests.Timeout, requests.ConnectionError):
+        pass  # Dienst nicht erreichbar
+    except (ValueError, KeyError, TypeError):
+        pass  # kein/kaputtes JSON oder unerwartete Struktur (z.B. 429 mit HTML)
+    # Nur Fehlschläge aus der Auswahl merken; ein gescheiterter Vorab-Abruf darf die Auswahl nicht blockieren
+    if remember_failure: FAILED_ADDRESSES.add(key)
+    return None
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_coordinates(address_string):
+    # Nur Fallback für Schulen ohne "coords" in SCHUL_DATEN: erst Platten-Cache, dann Nominatim
+    if not address_string: return None
+    return _geocode(get_session(), address_string)
+
+def _prefetch_worker(session, addresses):
+    for address in addresses:
+        _geocode(session, address, remember_failure=False, timeout=PREFETCH_TIMEOUT)
+
+# Einmal pro Prozess alle Schuladressen ohne "coords" im Hintergrund auf Platte geocoden,
+# damit schon die erste Auswahl jeder Schule aus dem Cache kommt. Blockiert den Seitenaufbau nicht.
+@st.cache_resource(show_spinner=False)
+def prefetch_coordinates():
+    thread = threading.Thread(target=_prefetch_worker, args=(get_session(), GEOCODE_ADDRESSES), daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_data(ttl=600, show_spinner=False)
+def get_weather_data(lat, lon):
+    try:
+        params = {"latitude": lat, "longitude": lon, "current_weather": "true", "timezone": "Europe/Berlin"}
+        r = http_get(API_URL_WEATHER, params=params)
+        return orjson.loads(r.content).get("current_weather", None)
+    except HTTP_ERRORS: return None
+
+def _round_geometry(coords):
+    # Koordinaten auf 6 Nachkommastellen (~0,1 m) kürzen -> deutlich kleineres GeoJSON
+    if coords and isinstance(coords[0], (int, float)):
+        return [round(c, 6) for c in coords]
+    return [_round_geometry(c) for c in coords]
+
+# Douglas-Peucker nur für detailreiche Umringe; Toleranz in Grad (~1,5 m)
+SIMPLIFY_TOLERANCE = 0.00002
+SIMPLIFY_MIN_VERTICES = 50
+
+def _simplify_ring(pts, tol):
+    keep = [False] * len(pts)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(pts) - 1)]
+    while stack:
+        a, b = stack.pop()
+        ax, ay = pts[a][0], pts[a][1]
+        dx, dy = pts[b][0] - ax, pts[b][1] - ay
+        norm = math.hypot(dx, dy)
+        best, idx = 0.0, None
+        for i in range(a + 1, b):
+            px, py = pts[i][0] - ax, pts[i][1] - ay
+            # Abstand zur Sehne; bei geschlossenem Ring (a == b räumlich) Abstand zum Startpunkt
+            d = abs(dy * px - dx * py) / norm if norm else math.hypot(px, py)
+            if d > best:
+                best, idx = d, i
+        if idx is not None and best > tol:
+            keep[idx] = True
+            stack += [(a, idx), (idx, b)]
+    out = [p for p, k in zip(pts, keep) if k]
+    return out if len(out) >= 4 else pts  # gültiger Ring braucht mind. 4 Punkte
+
+def _simplify_rings(coords):
+    if not coords or not coords[0]: return coords  # leerer (Multi-)Polygon-Teil
+    if isinstance(coords[0][0], (int, float)):
+        return _simplify_ring(coords, SIMPLIFY_TOLERANCE) if len(coords) > SIMPLIFY_MIN_VERTICES else coords
+    return [_simplify_rings(c) for c in coords]
+
+def slim_buildings(data):
+    # Nur behalten, was Auswahl & Tooltip nutzen (id, Geometrie, Gebäudefunktion).
+    # bbox, crs und die ALKIS-Attribute würden sonst komplett an den Browser gehen.
+    features = []
+    for f in data["features"]:
+        props = f.get("properties") or {}
+        geom = f.get("geometry")
+        if not geom or not geom.get("coordinates"):
+            continue  # ohne Geometrie nicht darstellbar
+        coords = geom["coordinates"]
+        if geom["type"] in ("Polygon", "MultiPolygon"):
+            coords = _simplify_rings(coords)
+        geom = {"type": geom["type"], "coordinates": _round_geometry(coords)}
+        if _feature_center(geom) is None:
+            continue  # nur leere Ringe -> kein einziger Stützpunkt
+        features.append({
+            "type": "Feature",
+            "id": f.get("id") or props.get("gml_id"),
+            "geometry": geom,
+            "properties": {"gebaeudefunktion_bezeichnung": props.get("gebaeudefunktion_bezeichnung") or "Gebäude"},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+def _feature_center(geom):
+    # Grober Mittelpunkt: Mittelwert der Stützpunkte des ersten (Außen-)Rings
+    pts = geom["coordinates"]
+    if pts and isinstance(pts[0], (int, float)):
+        pts = [pts]
+    while pts and pts[0] and not isinstance(pts[0][0], (int, float)):
+        pts = pts[0]
+    if not pts or not pts[0]: return None  # leere Geometrie
+    return sum(p[0] for p in pts) / len(pts), sum(p[1] for p in pts) / len(pts)
+
+def sort_nearest_first(collection, lat, lon):
+    # Einmal pro Abruf (gecacht) sortieren, damit das Schulgebäude oben in der Auswahl steht
+    scale = math.cos(math.radians(lat))
+    def dist(f):
+        x, y = _feature_center(f["geometry"])
+        return ((x - lon) * scale) ** 2 + (y - lat) ** 2
+    collection["features"].sort(key=dist)
+    return collection
+
+# --- GEBÄUDE DATEN LADEN (ROBUST) ---
+# ALKIS-Gebäude ändern sich über Monate, nicht Sekunden: aufbereitetes GeoJSON samt ETag/Last-Modified
+# auf Platte halten und nur bedingt neu anfragen (304 = kein Body). Ohne Validatoren gilt es 30 Tage.
+WFS_CACHE_DIR = Path(__file__).with_name(".wfs_cache")
+WFS_CACHE_MAX_AGE = 30 * 24 * 3600
+WFS_RADIUS_M = 100  # halbe Kantenlänge des Abfrage-Quadrats
+
+def _wfs_cache_path(key):
+    # Radius im Dateinamen: Einträge mit anderer BBOX-Größe werden nicht wiederverwendet
+    return WFS_CACHE_DIR / f"{key[0]}_{key[1]}_{WFS_RADIUS_M}m.json"
+
+def _load_wfs_cache(key):
+    try:
+        return orjson.loads(_wfs_cache_path(key).read_bytes())
+    except (OSError, ValueError):
+        return None
+
+def _store_wfs_cache(key, params, response, collection):
+    entry = {
+        "saved": time.time(),
+        "params": params,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "data": collection,
+    }
+    try:
+        WFS_CACHE_DIR.mkdir(exist_ok=True)
+        _wfs_cache_path(key).write_bytes(orjson.dumps(entry))
+    except OSError:
+        pass
+
+# PROPERTYNAME nur mit Feldnamen, die der Dienst laut DescribeFeatureType wirklich hat.
+# Einmal pro Prozess; None -> ungefiltert abfragen. Netz-/Parse-Fehler werfen und werden so nicht gecacht.
+@st.cache_resource(show_spinner=False)
+def _describe_wfs_propertyname():
+    params = {"SERVICE": "WFS", "VERSION": "1.1.0", "REQUEST": "DescribeFeatureType", "TYPENAME": _WFS_PARAMS_BASE["TYPENAME"]}
+    root = ElementTree.fromstring(get_session().get(WFS_ALKIS_SIMPLE, params=params, timeout=HTTP_TIMEOUT).content)
+    types = {el.get("name"): el.get("type") or "" for el in root.iter("{http://www.w3.org/2001/XMLSchema}element")}
+    # Geometrie-Attribut = Element mit GML-Property-Typ (gml:SurfacePropertyType, gml:GeometryPropertyType, ...)
+    geom = next((name for name, t in types.items() if t.startswith("gml:") and t.endswith("PropertyType")), None)
+    if not geom or any(f not in types for f in WFS_PROPERTIES): return None
+    return ",".join((*WFS_PROPERTIES, geom))
+
+# Fehlschlag kurz merken: solange DescribeFeatureType hängt, zahlt nicht jeder neue Standort den Timeout erneut
+WFS_SCHEMA_RETRY = 300  # s
+_wfs_schema_retry_at = 0.0
+
+def wfs_propertyname():
+    global _wfs_schema_retry_at
+    if not WFS_PROPERTIES or time.monotonic() < _wfs_schema_retry_at: return None
+    try:
+        return _describe_wfs_propertyname()
+    except (requests.RequestException, ElementTree.ParseError):
+        _wfs_schema_retry_at = time.monotonic() + WFS_SCHEMA_RETRY
+        return None  # bis dahin ungefiltert abfragen
+
+def _fetch_wfs(session, params, headers=None):
+    # Liefert (Antwort, Daten oder None, tatsächlich verwendete Parameter) -> die landen im Platten-Cache
+    r = session.get(WFS_ALKIS_SIMPLE, params=params, headers=headers, timeout=6)
+    if r.status_code == 304: return r, None, params
+    projected = "PROPERTYNAME" in params
+    try:
+        # orjson direkt auf den Bytes: schneller als r.json() und ohne dekodierte Text-Kopie
+        data = orjson.loads(r.content) if r.status_code == 200 else None
+    except ValueError:
+        if not projected: raise
+        data = None  # z.B. ExceptionReport als XML, weil der Dienst PROPERTYNAME ablehnt
+    features = (data or {}).get("features") or ()
+    if projected and not any(f.get("geometry") for f in features):
+        # Projektion nicht unterstützt (oder Geometrie weggefiltert) -> einmal ungefiltert
+        # (ohne Validatoren: die gehören zur projizierten Antwort)
+        return _fetch_wfs(session, {k: v for k, v in params.items() if k != "PROPERTYNAME"})
+    return r, (data if features else None), params
+
+# cache_resource: das GeoJSON wird per Referenz geteilt statt bei jedem Treffer kopiert (nicht verändern!)
+# Cache-Schlüssel ist nur `key` (gerundet); _lat/_lon (exakt, für die BBOX) hasht Streamlit nicht mit
+@st.cache_resource(show_spinner=False)
+def get_buildings_robust(key, _lat, _lon):
+    lat, lon = _lat, _lon
+    debug_log = []
+    session = get_session()
+
+    cached = _load_wfs_cache(key)
+    if cached:
+        validators = {"If-None-Match": cached["etag"], "If-Modified-Since": cached["last_modified"]}
+        validators = {k: v for k, v in validators.items() if v}
+        if not validators:
+            if time.time() - cached["saved"] < WFS_CACHE_MAX_AGE:
+                return cached["data"], debug_log
+        else:
+            try:
+                r, data, used = _fetch_wfs(session, cached["params"], headers=validators)
+                if r.status_code == 304:
+                    return cached["data"], debug_log
+                if data:
+                    collection = sort_nearest_first(slim_buildings(data), lat, lon)
+                    _store_wfs_cache(key, used, r, collection)
+                    return collection, debug_log
+            except (requests.RequestException, ValueError) as e:
+                # Dienst nicht erreichbar oder kein JSON (z.B. ExceptionReport mit HTTP 200):
+                # lieber den letzten bekannten Stand zeigen
+                debug_log.append(f"Revalidierung failed: {str(e)}")
+                return cached["data"], debug_log
+
+    # Quadrat mit WFS_RADIUS_M (100 m) halber Kantenlänge: ein Längengrad ist in Hamburg nur ~0,6 Breitengrade breit
+    d_lat = WFS_RADIUS_M / 111320
+    d_lon = d_lat / math.cos(math.radians(lat))
+
+    # STRATEGIE A: WFS 1.1.0 mit Lat, Lon
+    bbox_a = f"{lat-d_lat},{lon-d_lon},{lat+d_lat},{lon+d_lon}"
+    
+    base = {**_WFS_PARAMS_BASE, "PROPERTYNAME": wfs_propertyname()}
+    base = {k: v for k, v in base.items() if v}
+    params_a = {**base, "VERSION": "1.1.0", "BBOX": f"{bbox_a},EPSG:4326"}
+
+    # STRATEGIE B: WFS 1.0.0 mit Lon, Lat (Fallback)
+    bbox_b = f"{lon-d_lon},{lat-d_lat},{lon+d_lon},{lat+d_lat}"
+    params_b = {**base, "VERSION": "1.0.0", "BBOX": bbox_b}
+
+    # A zuerst, B nur wenn A scheitert oder nichts liefert: genau ein Request im Normalfall,
+    # kein paralleler Verlierer, der bis zu seinem Timeout eine Pool-Verbindung belegt
+    for name, params in (("A", params_a), ("B", params_b)):
+        try:
+            r, data, params = _fetch_wfs(session, params)
+        except Exception as e:
+            debug_log.append(f"{name} failed: {str(e)}")
+            continue
+        if data:
+            collection = sort_nearest_first(slim_buildings(data), lat, lon)
+            _store_wfs_cache(key, params, r, collection)
+            return collection, debug_log
+
+    # Neuabruf gescheitert: abgelaufener Stand auf Platte ist besser als gar keine Gebäude
+    if cached:
+        debug_log.append("Neuabruf failed: zeige gespeicherten Stand")
+        return cached["data"], debug_log
+    return None, debug_log
+
+def phrase(text):
+    # Als Solr-Phrase quoten: \ und " escapen, sonst bricht die Suche (bzw. die Phrase) auf
+    text = " ".join(str(text).split()).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def query_transparenzportal(search_term, limit=5):
+    try:
+        # Whitespace vereinheitlichen -> gleiche URL für gleiche Suche (Server-/CDN-Cache).
+        # Nicht kleinschreiben: OR/AND sind für Solr nur in Großbuchstaben Operatoren.
+        params = {"q": " ".join(search_term.split()), "rows": limit, "sort": "score desc, metadata_modified desc"}
+        r = http_get(API_URL_TRANSPARENZ, params=params)
+        payload = orjson.loads(r.content)
+        return payload["result"]["results"] if payload.get("success") else []
+    except HTTP_ERRORS + (KeyError,): return []
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def query_many(queries):
+    # Alle Szenarien in einem Rutsch parallel abfragen (Tuple -> hashbar für den Cache)
+    # Ein Worker pro Szenario: Gesamtdauer = langsamste Einzelabfrage
+    with ThreadPoolExecutor(max_workers=len(queries) or 1) as pool:
+        # Normalisiert weiterreichen, damit Schreibvarianten denselben query_transparenzportal-Cacheeintrag treffen
+        terms = [" ".join(q.split()) for q in queries]
+        return dict(zip(queries, pool.map(query_transparenzportal, terms)))
+
+def _doc_link(item, get=dict.get):
+    # Erstes PDF gewinnt (früher Abbruch), sonst die Paket-URL
+    for res in get(item, "resources") or ():
+        if (get(res, "format") or "").lower() == "pdf":
+            return get(res, "url")
+    return get(item, "url", "")
+
+def extract_docs(results):
+    # Zeilen als Dicts für st.dataframe (ohne pandas-Umweg); Generator -> Aufrufer entscheidet, wie viel er braucht
+    get = dict.get
+    for item in results:
+        yield {"Dokument": get(item, "title"), "Datum": (get(item, "metadata_modified") or "")[:10], "Link": _doc_link(item)}